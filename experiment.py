@@ -1,6 +1,13 @@
+import os
+import random
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from functools import cache
 from math import inf
 from takpy import (
     new_game,
+    game_from_tps,
     Color,
     GameResult,
     Game,
@@ -13,10 +20,188 @@ from takpy import (
 Square = None | tuple[Piece, list[Color]]
 Board = list[list[Square]]
 
+# Zobrist hashing
+# https://www.chessprogramming.org/Zobrist_Hashing
+MAX_SIZE = 8
+MAX_HEIGHT = 2 * (50 + 2)  # every stone and capstone of both players on one square
+# Enums from takpy are not hashable, so tables are indexed with their int values.
+# Keys for the piece on top of each stack, indexed by `3 * int(color) + int(piece)`.
+ZOBRIST = [
+    [[random.getrandbits(64) for _ in range(6)] for _ in range(MAX_SIZE)]
+    for _ in range(MAX_SIZE)
+]
+# Keys for the colors of the pieces buried under the top of each stack.
+ZOBRIST_STACK = [
+    [
+        [[random.getrandbits(64) for _ in range(2)] for _ in range(MAX_HEIGHT)]
+        for _ in range(MAX_SIZE)
+    ]
+    for _ in range(MAX_SIZE)
+]
+ZOBRIST_SIDE = random.getrandbits(64)
+
+# Row and column offsets indexed by `int(direction)`: Up, Down, Left, Right.
+DIRECTION_DELTA = [(1, 0), (-1, 0), (0, -1), (0, 1)]
+
+
+def piece_index(piece: Piece, color: Color) -> int:
+    """Index of a piece of some color into the Zobrist keys and bitboards."""
+    return 3 * int(color) + int(piece)
+
+
+def stack_hash(row: int, col: int, piece: Piece, colors: list[Color]) -> int:
+    """Hash a single stack."""
+    h = ZOBRIST[row][col][piece_index(piece, colors[-1])]
+    for height, color in enumerate(colors[:-1]):
+        h ^= ZOBRIST_STACK[row][col][height][int(color)]
+    return h
+
+
+def zobrist(game: Game) -> int:
+    """Hash the position so that it can be looked up in the transposition table."""
+    h = 0
+    for row, squares in enumerate(game.board()):
+        for col, square in enumerate(squares):
+            if square is not None:
+                h ^= stack_hash(row, col, *square)
+    if game.to_move == Color.Black:
+        h ^= ZOBRIST_SIDE
+    return h
+
+
+# Bitboards
+# https://www.chessprogramming.org/Bitboards
+# There is one bitboard per piece index, where bit `row * size + col` is set
+# if that piece is on top of the stack at (row, col).
+
+
+def bitboards_from_board(board: Board, size: int) -> list[int]:
+    bitboards = [0] * 6
+    for row, squares in enumerate(board):
+        for col, square in enumerate(squares):
+            if square is not None:
+                piece, colors = square
+                bitboards[piece_index(piece, colors[-1])] |= 1 << (row * size + col)
+    return bitboards
+
+
+@cache
+def row_masks(size: int) -> list[int]:
+    return [((1 << size) - 1) << (row * size) for row in range(size)]
+
+
+@cache
+def col_masks(size: int) -> list[int]:
+    return [sum(1 << (row * size + col) for row in range(size)) for col in range(size)]
+
+
+@dataclass
+class HashedGame:
+    """A game together with its Zobrist hash, bitboards, and flat count difference."""
+
+    game: Game
+    hash: int
+    bitboards: list[int]
+    fcd: int  # white top flats minus black top flats, without komi
+
+
+def hashed(game: Game) -> HashedGame:
+    bitboards = bitboards_from_board(game.board(), game.size)
+    fcd = (
+        bitboards[piece_index(Piece.Flat, Color.White)].bit_count()
+        - bitboards[piece_index(Piece.Flat, Color.Black)].bit_count()
+    )
+    return HashedGame(game, zobrist(game), bitboards, fcd)
+
+
+def hashed_clone_and_play(hg: HashedGame, move: Move) -> HashedGame:
+    """Play a move on a clone of the game and update the hash, bitboards, and fcd incrementally.
+    Only the squares touched by the move are updated."""
+    game = hg.game
+    row, col = move.square
+    # Collect how each touched square changes as (row, col, before, after).
+    changes = []
+    match move.kind:
+        case MoveKind.Place:
+            # During the first two plies each player places an opponent's flat.
+            color = game.to_move if game.ply >= 2 else game.to_move.next()
+            changes.append((row, col, None, (move.piece, [color])))
+        case MoveKind.Spread:
+            board = game.board()
+            piece, colors = board[row][col]
+            drop_counts = move.drop_counts()
+            taken = sum(drop_counts)
+            left, carried = colors[:-taken], colors[-taken:]
+            # Lift the pieces off the source square.
+            changes.append(
+                (row, col, (piece, colors), (Piece.Flat, left) if left else None)
+            )
+            # Drop them one square at a time.
+            dr, dc = DIRECTION_DELTA[int(move.direction)]
+            for drop_count in drop_counts:
+                row, col = row + dr, col + dc
+                dropped, carried = carried[:drop_count], carried[drop_count:]
+                before = board[row][col]
+                below = [] if before is None else before[1]
+                # Only the last square gets the original top piece.
+                top = Piece.Flat if carried else piece
+                changes.append((row, col, before, (top, below + dropped)))
+
+    h = hg.hash ^ ZOBRIST_SIDE
+    bitboards = hg.bitboards.copy()
+    fcd = hg.fcd
+    for row, col, before, after in changes:
+        bit = 1 << (row * game.size + col)
+        # Remove the old stack and add the new one.
+        for stack, sign in ((before, -1), (after, 1)):
+            if stack is not None:
+                piece, colors = stack
+                h ^= stack_hash(row, col, piece, colors)
+                bitboards[piece_index(piece, colors[-1])] ^= bit
+                if piece == Piece.Flat:
+                    fcd += sign * (1 - 2 * int(colors[-1]))
+    return HashedGame(game.clone_and_play(move), h, bitboards, fcd)
+
+
+# Transposition table
+# https://www.chessprogramming.org/Transposition_Table
+EXACT = 0
+LOWER = 1
+UPPER = 2
+# Fixed number of slots (a power of two), each picked by the low bits of the hash.
+TT_SIZE = 2**20
+# Each slot holds (key, depth, value, node_type, best_move, generation).
+TT: list[tuple[int, int, float, int, Move, int] | None] = [None] * TT_SIZE
+# Incremented for every search, so that entries from earlier searches can be replaced.
+tt_generation = 0
+
+
+def tt_new_search():
+    global tt_generation
+    tt_generation += 1
+
 
-def game_eval(game: Game) -> float:
-    """Evaluate the board position. Positive outputs mean good for white, negative outputs mean good for black. Zero means draw."""
-    match game.result:
+def tt_probe(key: int) -> tuple[int, float, int, Move] | None:
+    entry = TT[key & (TT_SIZE - 1)]
+    if entry is None or entry[0] != key:
+        return None
+    return entry[1:5]
+
+
+def tt_store(key: int, depth: int, value: float, node_type: int, best_move: Move):
+    index = key & (TT_SIZE - 1)
+    old = TT[index]
+    # Depth-preferred replacement, except that entries left over
+    # from an earlier search are always replaced.
+    if old is not None and old[5] == tt_generation and old[1] > depth:
+        return
+    TT[index] = (key, depth, value, node_type, best_move, tt_generation)
+
+
+def game_eval(game: Game, hg: HashedGame | None = None) -> float:
+    """Evaluate the board position. Positive outputs mean good for white, negative outputs mean good for black. Zero means draw.
+    If the hashed game is given, the board does not need to be fetched from takpy."""
+    match game.result():
         case GameResult.WhiteWin:
             return inf
         case GameResult.BlackWin:
@@ -25,81 +210,73 @@ def game_eval(game: Game) -> float:
             return 0
 
     # TODO: Improve this a lot, using ideas from move_ordering
+    if hg is not None:
+        return bitboard_eval(hg)
+    return eval_features(game.board(), game.size, game.half_komi)
+
+
+def bitboard_eval(hg: HashedGame) -> float:
+    """Same as `eval_features`, but computed from the incrementally updated state."""
+    size = hg.game.size
     return (
-        calculate_fcd(game)
-        + unique_rows_and_cols(game, Color.White)
-        - unique_rows_and_cols(game, Color.Black)
+        hg.fcd
+        - hg.game.half_komi / 2
+        + unique_rows_and_cols(hg.bitboards, size, Color.White)
+        - unique_rows_and_cols(hg.bitboards, size, Color.Black)
     )
 
 
-def calculate_fcd(game: Game) -> int:
-    fcd = -game.half_komi / 2
-    for row in game.board:
-        for square in row:
-            if square is None:
-                continue
-            piece, colors = square
-            if piece == Piece.Flat:
-                match colors[-1]:
-                    case Color.White:
-                        fcd += 1
-                    case Color.Black:
-                        fcd -= 1
-    return fcd
-
-
-def unique_rows_and_cols(game: Game, color: Color) -> int:
-    rows = 0
-    for row in game.board:
-        for square in row:
-            if square is None:
-                continue
-            _piece, colors = square
-            if colors[-1] == color:
-                rows += 1
-                break
-    columns = 0
-    for col in ((row[i] for row in game.board) for i in range(game.size)):
-        for square in col:
+def eval_features(board: Board, size: int, half_komi: int) -> float:
+    """Evaluate the board in a single pass, from white's perspective.
+    The score is the flat count difference minus komi, plus the number of rows
+    and columns that white occupies, minus the number that black occupies."""
+    fcd = -half_komi / 2
+    # Indexed by [int(color)][row or column].
+    row_has = [[False] * size, [False] * size]
+    col_has = [[False] * size, [False] * size]
+    flat = int(Piece.Flat)
+    for row, squares in enumerate(board):
+        for col, square in enumerate(squares):
             if square is None:
                 continue
-            _piece, colors = square
-            if colors[-1] == color:
-                columns += 1
-                break
+            color = int(square[1][-1])
+            if int(square[0]) == flat:
+                # White is 0 and Black is 1, so this is +1 for white and -1 for black.
+                fcd += 1 - 2 * color
+            row_has[color][row] = True
+            col_has[color][col] = True
+    return fcd + sum(row_has[0]) + sum(col_has[0]) - sum(row_has[1]) - sum(col_has[1])
+
+
+def unique_rows_and_cols(bitboards: list[int], size: int, color: Color) -> int:
+    occupied = (
+        bitboards[piece_index(Piece.Flat, color)]
+        | bitboards[piece_index(Piece.Wall, color)]
+        | bitboards[piece_index(Piece.Cap, color)]
+    )
+    rows = sum(1 for mask in row_masks(size) if occupied & mask)
+    columns = sum(1 for mask in col_masks(size) if occupied & mask)
     return rows + columns
 
 
-def cols(board: Board, size: int) -> Board:
-    return [[row[i] for row in board] for i in range(size)]
-
-
-def row_col_score(board: Board, size: int, color: Color) -> tuple[list[int], list[int]]:
-    row_score = [
-        sum(
-            road_piece(square[0]) and square[1][-1] == color
-            for square in row
-            if square is not None
-        )
-        for row in board
-    ]
-    col_score = [
-        sum(
-            road_piece(square[0]) and square[1][-1] == color
-            for square in col
-            if square is not None
-        )
-        for col in cols(board, size)
-    ]
+def row_col_score(
+    bitboards: list[int], size: int, color: Color
+) -> tuple[list[int], list[int]]:
+    roads = (
+        bitboards[piece_index(Piece.Flat, color)]
+        | bitboards[piece_index(Piece.Cap, color)]
+    )
+    row_score = [(roads & mask).bit_count() for mask in row_masks(size)]
+    col_score = [(roads & mask).bit_count() for mask in col_masks(size)]
     return row_score, col_score
 
 
-def road_piece(piece: Piece) -> bool:
-    match piece:
-        case Piece.Flat | Piece.Cap:
-            return True
-        case Piece.Wall:
-            return False
+@cache
+def distance_from_center(size: int) -> list[list[float]]:
+    mid = (size - 1) / 2
+    return [
+        [abs(row - mid) + abs(col - mid) for col in range(size)] for row in range(size)
+    ]
 
 
 def neighbor_stacks(board: Board, size: int, row: int, col: int) -> list[Square]:
@@ -125,45 +302,61 @@ OPPONENT_NEXT_TO_NOBLE = 50
 STACK_NEXT_TO_NOBLE = 10
 FLAT_CAPTURE_PUNISHMENT = 100
 SPREAD_ME_BONUS = 20
+PIECES = (Piece.Flat, Piece.Wall, Piece.Cap)
 
 
-def move_ordering(game: Game) -> list[Move]:
-    possible_moves = game.possible_moves
+def move_ordering(
+    game: Game, first: Move | None = None, bitboards: list[int] | None = None
+) -> list[Move]:
+    possible_moves = game.possible_moves()
     me = game.to_move
     opponent = me.next()
-    board = game.board
-    row_score, col_score = row_col_score(board, game.size, me)
-
-    def move_rank(move: Move) -> float:
-        row, col = move.square
-        distance_to_center = abs(row - (game.size + 1) / 2) + abs(
-            col - (game.size + 1) / 2
-        )
-        neighbors = neighbor_stacks(board, game.size, row, col)
-        score = 0
-        match move.kind:
-            case MoveKind.Place:
-                score += PLACEMENT_VALUE
+    board = game.board()
+    size = game.size
+    ply = game.ply
+    distance = distance_from_center(size)
+    if bitboards is None:
+        bitboards = bitboards_from_board(board, size)
+    row_score, col_score = row_col_score(bitboards, size, me)
+
+    # Precompute the score of every placement, indexed by [row][col][int(piece)].
+    place_score = [[[0.0] * len(PIECES) for _ in range(size)] for _ in range(size)]
+    for row in range(size):
+        for col in range(size):
+            if board[row][col] is not None:
+                continue  # We can only place on empty squares.
+            distance_to_center = distance[row][col]
+            neighbors = neighbor_stacks(board, size, row, col)
+            for piece in PIECES:
+                score = PLACEMENT_VALUE
                 # Road rewards
-                match move.piece:
+                match piece:
                     case Piece.Flat | Piece.Cap:
                         score += ROAD_MOTIVATION * (row_score[row] + col_score[col])
                         score -= CENTER_PRIORITY * distance_to_center
                 # Noble rewards
-                match move.piece:
+                match piece:
                     case Piece.Cap | Piece.Wall:
                         for n in neighbors:
                             if n[1][-1] == opponent:
                                 score += OPPONENT_NEXT_TO_NOBLE
                             score += STACK_NEXT_TO_NOBLE * len(n[1])
                 # Piece-type bonus
-                match move.piece:
+                match piece:
                     case Piece.Flat:
                         score += FLAT_VALUE
                     case Piece.Cap:
                         score += CAP_VALUE
                     case Piece.Wall:
                         score += WALL_VALUE
+                place_score[row][col][int(piece)] = score
+
+    def move_rank(move: Move) -> float:
+        row, col = move.square
+        score = 0
+        match move.kind:
+            case MoveKind.Place:
+                return place_score[row][col][int(move.piece)]
             case MoveKind.Spread:
                 stack = board[row][col]
                 piece, colors = stack
@@ -172,50 +365,34 @@ def move_ordering(game: Game) -> list[Move]:
                     score -= FLAT_CAPTURE_PUNISHMENT
                 # Reward dropping our color on top
                 dropped = 0
-                for drop_count in move.drop_counts[:-1]:
+                for drop_count in move.drop_counts()[:-1]:
                     dropped += drop_count
                     if colors[dropped - 1] == me:
                         score += SPREAD_ME_BONUS
         return score
 
-    return sorted(game.possible_moves, key=move_rank, reverse=game.ply > 1)
+    moves = sorted(possible_moves, key=move_rank, reverse=ply > 1)
+    # Try the move suggested by the transposition table first.
+    if first is not None and first in moves:
+        moves.remove(first)
+        moves.insert(0, first)
+    return moves
 
 
-def is_color(
-    board: list[list[None | tuple[Piece, list[Color]]]],
-    row: int,
-    col: int,
-    color: Color,
-) -> bool:
-    try:
-        square = board[row][col]
-        return square is not None and square[1][-1] == color
-    except IndexError:
-        return False
+# Symbols for the top piece of each stack, indexed by [int(color)][int(piece)].
+GLYPHS = [["🟧 ", "🔶 ", "🟠 "], ["🟦 ", "🔷 ", "🔵 "]]
+EMPTY = "🔳 "
 
 
 def pretty_print(game: Game):
     print(game)
-    for i, row in list(enumerate(game.board, 1))[::-1]:
-        print(i, end=" ")
-        for square in row:
-            if square is None:
-                print("🔳", end=" ")
-                continue
-            match square:
-                case (Piece.Flat, [*_, Color.White]):
-                    print("🟧", end=" ")
-                case (Piece.Wall, [*_, Color.White]):
-                    print("🔶", end=" ")
-                case (Piece.Cap, [*_, Color.White]):
-                    print("🟠", end=" ")
-                case (Piece.Flat, [*_, Color.Black]):
-                    print("🟦", end=" ")
-                case (Piece.Wall, [*_, Color.Black]):
-                    print("🔷", end=" ")
-                case (Piece.Cap, [*_, Color.Black]):
-                    print("🔵", end=" ")
-        print()
+    board = game.board()
+    for i in range(game.size, 0, -1):
+        cells = [
+            EMPTY if square is None else GLYPHS[int(square[1][-1])][int(square[0])]
+            for square in board[i - 1]
+        ]
+        print(f"{i} " + "".join(cells))
     print("   a  b  c  d  e  f  g  h"[: 1 + game.size * 3])
 
 
@@ -223,90 +400,195 @@ def player_move(game: Game):
     while True:
         move = input("your move: ")
         try:
-            game.play(Move.from_ptn(move))
+            game.play(Move(move))
             break
         except Exception as e:
             print(e)
 
 
+def game_eval_signed(game: Game, hg: HashedGame | None = None) -> float:
+    """Evaluate the board position from the perspective of the player to move."""
+    value = game_eval(game, hg)
+    return -value if game.to_move == Color.Black else value
+
+
 # https://en.wikipedia.org/wiki/Negamax
 def negamax(game: Game, depth: int) -> float:
-    match game.result:
-        case GameResult.WhiteWin:
-            return inf
-        case GameResult.BlackWin:
-            return -inf
-        case GameResult.Draw:
-            return 0.0
-    if depth == 0:
-        return game_eval(game)
-    if game.to_move == Color.White:
-        for move in game.possible_moves:
-            clone = game.clone()
-            clone.play(move)
-            value = max(value, negamax(clone, depth - 1))
-    else:
-        for move in game.possible_moves:
-            clone = game.clone()
-            clone.play(move)
-            value = min(value, negamax(clone, depth - 1))
+    if depth == 0 or game.result() != GameResult.Ongoing:
+        return game_eval_signed(game)
+    value = -inf
+    for move in game.possible_moves():
+        search_value = -negamax(game.clone_and_play(move), depth - 1)
+        if search_value > value:
+            value = search_value
     return value
 
 
-# https://en.wikipedia.org/wiki/Alpha%E2%80%93beta_pruning
-def alpha_beta(game: Game, depth: int, alpha: float = -inf, beta: float = inf) -> float:
-    match game.to_move, game.result:
-        case GameResult.WhiteWin:
-            return inf
-        case GameResult.BlackWin:
-            return -inf
-        case GameResult.Draw:
-            return 0.0
-    if depth == 0:
-        return game_eval(game)
-
-    moves = move_ordering(game)
-    if game.to_move == Color.White:
-        value = -inf
-        for move in moves:
-            search_value = alpha_beta(game.clone_and_play(move), depth - 1, alpha, beta)
-            value = max(value, search_value)
-            if value > beta:
-                break  # beta cutoff
-            alpha = max(alpha, beta)
-        return value
+class SearchTimeout(Exception):
+    """Raised when the search runs out of time."""
 
-    else:
-        value = inf
-        for move in moves:
-            search_value = alpha_beta(game.clone_and_play(move), depth - 1, alpha, beta)
-            value = min(value, search_value)
-            if value < alpha:
-                break  # alpha cutoff
-            beta = min(beta, value)
 
+# The search stops once time.monotonic() passes this.
+search_deadline = inf
 
-def bot_move(game: Game):
-    moves = move_ordering(game)
 
-    # Find out which move gives the best evaluation.
-    # We do this by trying each move in turn and comparing the static evaluations.
-    best_eval = -inf
+# https://en.wikipedia.org/wiki/Alpha%E2%80%93beta_pruning
+def alpha_beta(
+    hg: HashedGame, depth: int, alpha: float = -inf, beta: float = inf
+) -> float:
+    """Search the game tree in negamax form.
+    The value is from the perspective of the player to move."""
+    game = hg.game
+    if depth == 0 or game.result() != GameResult.Ongoing:
+        return game_eval_signed(game, hg)
+    if time.monotonic() >= search_deadline:
+        raise SearchTimeout
+
+    key = hg.hash
+    tt_move = None
+    entry = tt_probe(key)
+    if entry is not None:
+        tt_depth, tt_value, tt_type, tt_move = entry
+        if tt_depth >= depth:
+            if tt_type == EXACT:
+                return tt_value
+            elif tt_type == LOWER:
+                alpha = max(alpha, tt_value)
+            elif tt_type == UPPER:
+                beta = min(beta, tt_value)
+            if alpha >= beta:
+                return tt_value
+    original_alpha = alpha
+
+    moves = move_ordering(game, tt_move, hg.bitboards)
     best_move = moves[0]
+    value = -inf
     for move in moves:
-        # Create a clone of the game and try playing the move.
-        copy = game.clone()
-        copy.play(move)
-        # Evaluate the position afterwards.
-        current_eval = eval(copy)
-        # The evaluation is from white's perspective, so we need to flip it when black.
-        if game.to_move == Color.Black:
-            current_eval = -current_eval
-        # If the current evaluation is better than the previous best, this move must be better.
-        if current_eval > best_eval:
+        search_value = -alpha_beta(
+            hashed_clone_and_play(hg, move), depth - 1, -beta, -alpha
+        )
+        if search_value > value:
+            value = search_value
             best_move = move
-            best_eval = current_eval
-    print("bot move:", best_move, "with eval", best_eval)
+        alpha = max(alpha, value)
+        if alpha >= beta:
+            break  # beta cutoff
+
+    if value <= original_alpha:
+        node_type = UPPER
+    elif value >= beta:
+        node_type = LOWER
+    else:
+        node_type = EXACT
+    tt_store(key, depth, value, node_type, best_move)
+    return value
+
+
+# Worker processes for searching root moves in parallel.
+# Processes avoid the GIL, so they can use every core.
+POOL = ProcessPoolExecutor(max_workers=os.cpu_count())
+# Below this depth the searches are too small to be worth sending to a worker.
+PARALLEL_DEPTH = 3
+
+
+def search_after_move(
+    tps: str,
+    size: int,
+    half_komi: int,
+    ptn: str,
+    depth: int,
+    alpha: float,
+    generation: int,
+    deadline: float,
+) -> float:
+    """Search a root move in a worker process.
+    takpy objects cannot be pickled, so the game is sent as TPS and the move as PTN."""
+    # Workers do not share module globals with the main process, so set them here.
+    global tt_generation, search_deadline
+    tt_generation = generation
+    search_deadline = deadline
+    hg = hashed(game_from_tps(size, tps, half_komi))
+    return -alpha_beta(hashed_clone_and_play(hg, Move(ptn)), depth - 1, -inf, -alpha)
+
+
+def alpha_beta_root(hg: HashedGame, depth: int) -> tuple[float, Move]:
+    """Search every move at the root and return the best evaluation and move."""
+    game = hg.game
+    entry = tt_probe(hg.hash)
+    tt_move = entry[3] if entry is not None else None
+    first, *rest = move_ordering(game, tt_move, hg.bitboards)
+
+    # Young Brothers Wait: search the first move on its own to get a good bound,
+    # then search the remaining moves in parallel with that bound.
+    # https://www.chessprogramming.org/Young_Brothers_Wait_Concept
+    best_move = first
+    best_eval = -alpha_beta(hashed_clone_and_play(hg, first), depth - 1)
+    futures = []
+    if depth >= PARALLEL_DEPTH:
+        # Each worker process has its own transposition table, so the entries
+        # stored while searching these moves stay in the worker. At the next
+        # depth, only the search below the first move gets help from this table.
+        tps = repr(game)
+        futures = [
+            POOL.submit(
+                search_after_move,
+                tps,
+                game.size,
+                game.half_komi,
+                repr(move),
+                depth,
+                best_eval,
+                tt_generation,
+                search_deadline,
+            )
+            for move in rest
+        ]
+        evals = (future.result() for future in futures)
+    else:
+        # Evaluated lazily, so each search uses the best bound found so far.
+        evals = (
+            -alpha_beta(hashed_clone_and_play(hg, move), depth - 1, -inf, -best_eval)
+            for move in rest
+        )
+    try:
+        for move, current_eval in zip(rest, evals):
+            if current_eval > best_eval:
+                best_move = move
+                best_eval = current_eval
+    except SearchTimeout:
+        # Drop the searches that have not been started yet.
+        for future in futures:
+            future.cancel()
+        raise
+    # Remember the best move so that the next depth tries it first.
+    tt_store(hg.hash, depth, best_eval, EXACT, best_move)
+    return best_eval, best_move
+
+
+MAX_DEPTH = 10
+SEARCH_SECONDS = 0.1
+
+
+def bot_move(game: Game):
+    global search_deadline
+    hg = hashed(game)
+    deadline = time.monotonic() + SEARCH_SECONDS
+    tt_new_search()
+
+    # Iterative deepening: search one ply deeper each time until we run out of time.
+    # https://www.chessprogramming.org/Iterative_Deepening
+    for depth in range(1, MAX_DEPTH + 1):
+        # Always finish the first depth, so that there is a move to play.
+        search_deadline = deadline if depth > 1 else inf
+        try:
+            best_eval, best_move = alpha_beta_root(hg, depth)
+        except SearchTimeout:
+            # Play the best move from the previous depth.
+            depth -= 1
+            break
+        if best_eval == inf or time.monotonic() >= deadline:
+            break
+    print("bot move:", best_move, "with eval", best_eval, "at depth", depth)
     game.play(best_move)
 
 
@@ -319,8 +601,8 @@ def bot_move_old(game: Game):
     best_move = moves[0]
     for move in moves:
         # Create a clone of the game and try playing the move.
-        copy = game.clone()
-        copy.play(move)
+        # Use clone_and_play rather than clone() followed by play(), which calls into takpy twice.
+        copy = game.clone_and_play(move)
         # Evaluate the position afterwards.
         current_eval = eval(copy)
         # The evaluation is from white's perspective, so we need to flip it when black.
@@ -344,14 +626,14 @@ def main():
     player_color = Color.White
 
     pretty_print(game)
-    while game.result == GameResult.Ongoing:
+    while game.result() == GameResult.Ongoing:
         if game.to_move == player_color:
             player_move(game)
         else:
             bot_move(game)
         pretty_print(game)
 
-    match game.result:
+    match game.result():
         case GameResult.WhiteWin:
             print("🟧 wins!")
         case GameResult.BlackWin:
@@ -1,5 +1,6 @@
 from takpy import Color, Game, Move, MoveKind, Piece
 from collections.abc import Iterable
+from functools import cache
 
 # Helper types
 Stack = tuple[Piece, list[Color]]
@@ -14,6 +15,8 @@ ROW_COLUMN_ROAD = 10
 CAP_NEXT_TO_OPPONENT_STACK = 50
 CENTER_PLACEMENT = 10
 
+PIECES = (Piece.Flat, Piece.Wall, Piece.Cap)
+
 
 def road_piece(piece: Piece | None) -> bool:
     return piece == Piece.Flat or piece == Piece.Cap
@@ -27,11 +30,6 @@ def count_road_pieces(stacks: Iterable[None | Stack], color: Color) -> int:
     )
 
 
-def columns(board: Board) -> Board:
-    """Get the columns of a board."""
-    return [[row[i] for row in board] for i in range(len(board[0]))]
-
-
 def row_score(board: Board, color: Color) -> list[int]:
     """Count the road pieces per row."""
     return [count_road_pieces(row, color) for row in board]
@@ -39,7 +37,11 @@ def row_score(board: Board, color: Color) -> list[int]:
 
 def col_score(board: Board, color: Color) -> list[int]:
     """Count the road pieces per column."""
-    return [count_road_pieces(col, color) for col in columns(board)]
+    size = len(board)
+    return [
+        count_road_pieces((board[row][col] for row in range(size)), color)
+        for col in range(size)
+    ]
 
 
 def neighbor_stacks(board: Board, size: int, row: int, col: int) -> list[Stack]:
@@ -56,14 +58,20 @@ def neighbor_stacks(board: Board, size: int, row: int, col: int) -> list[Stack]:
     return [n for n in neighbors if n is not None]
 
 
-def distance_from_center(row: int, col: int, size: int) -> float:
-    """Get the Manhattan distance from the center."""
+@cache
+def distance_from_center(size: int) -> list[list[float]]:
+    """Get the Manhattan distance from the center for every square."""
     mid = (size - 1) / 2
-    return abs(row - mid) + abs(col - mid)
+    return [
+        [abs(row - mid) + abs(col - mid) for col in range(size)] for row in range(size)
+    ]
 
 
-def winning_move(game: Game, moves: list[Move]) -> Move | None:
+def winning_move(game: Game, moves: list[Move] | None = None) -> Move | None:
     """Return a winning move if there is one."""
+    if moves is None:
+        # The order does not matter when we only want to know whether a win exists.
+        moves = game.possible_moves()
     for move in moves:
         after_move = game.clone_and_play(move)
         if after_move.result().color() == game.to_move:
@@ -71,64 +79,63 @@ def winning_move(game: Game, moves: list[Move]) -> Move | None:
     return None
 
 
-def move_kind_bonus(kind: MoveKind, distance: float) -> float:
-    """Get the move score bonus based on the move kind."""
-    match kind:
-        case MoveKind.Place:
-            return PLACEMENT - CENTER_PLACEMENT * distance
-        case MoveKind.Spread:
-            return SPREAD
-
-
-def piece_type_bonus(
-    piece: Piece | None, opp_color: Color, neighbors: list[Stack]
-) -> float:
-    """Get the move score bonus based on the piece type."""
-    match piece:
-        case Piece.Flat:
-            return FLAT
-        case Piece.Cap:
-            score = CAP
-            for _piece, colors in neighbors:
-                if colors[-1] == opp_color:
-                    score += CAP_NEXT_TO_OPPONENT_STACK * len(colors)
-            return score
-        case Piece.Wall:
-            return WALL
-        case None:
-            return 0
-
-
-def move_ordering(game: Game) -> list[Move]:
+def move_ordering(game: Game, moves: list[Move] | None = None) -> list[Move]:
     """Return an ordering of the possible moves from best to worst."""
+    if moves is None:
+        moves = game.possible_moves()
     board = game.board()
+    size = game.size
+    distance = distance_from_center(size)
     my_color, opp_color = game.to_move, game.to_move.next()
     # Precompute row and column scores.
-    my_row_score = row_score(board, game.to_move)
-    my_col_score = col_score(board, game.to_move)
+    my_row_score = row_score(board, my_color)
+    my_col_score = col_score(board, my_color)
+    # Capstones can only be placed while we have one in reserve.
+    reserves = game.white_reserves if my_color == Color.White else game.black_reserves
+    placeable = PIECES if reserves[1] > 0 else (Piece.Flat, Piece.Wall)
+    # Precompute the score of every placement, indexed by [row][column][int(piece)].
+    place_score = [[[0.0] * len(PIECES) for _ in range(size)] for _ in range(size)]
+    for row in range(size):
+        for column in range(size):
+            if board[row][column] is not None:
+                continue  # We can only place on empty squares.
+            for piece in placeable:
+                score = PLACEMENT - CENTER_PLACEMENT * distance[row][column]
+                # Piece type bonus
+                match piece:
+                    case Piece.Flat:
+                        score += FLAT
+                    case Piece.Cap:
+                        score += CAP
+                        for _piece, colors in neighbor_stacks(board, size, row, column):
+                            if colors[-1] == opp_color:
+                                score += CAP_NEXT_TO_OPPONENT_STACK * len(colors)
+                    case Piece.Wall:
+                        score += WALL
+                if road_piece(piece):
+                    score += ROW_COLUMN_ROAD * (
+                        my_row_score[row] + my_col_score[column]
+                    )
+                place_score[row][column][int(piece)] = score
 
     def move_score(move: Move) -> float:
         """Give each move a score. Larger is better."""
-        score = 0
-        row, column = move.square
-        distance = distance_from_center(row, column, game.size)
-        neighbors = neighbor_stacks(board, game.size, row, column)
-        score += move_kind_bonus(move.kind, distance)
-        score += piece_type_bonus(move.piece, opp_color, neighbors)
-        if road_piece(move.piece):
-            score += ROW_COLUMN_ROAD * (my_row_score[row] + my_col_score[column])
-        return score
+        if move.kind == MoveKind.Place:
+            row, column = move.square
+            return place_score[row][column][int(move.piece)]
+        return SPREAD
 
-    possible_moves = game.possible_moves()
-    return sorted(possible_moves, key=move_score, reverse=game.ply >= 2)
+    return sorted(moves, key=move_score, reverse=game.ply >= 2)
 
 
 def bot_move(game: Game) -> Move:
     """Pick a move automatically."""
-    sorted_moves = move_ordering(game)
+    # Generate the moves once and share them between the ordering and the win check.
+    moves = game.possible_moves()
+    sorted_moves = move_ordering(game, moves)
     best_move = sorted_moves[0]
 
-    possibly_winning = winning_move(game, sorted_moves)
+    possibly_winning = winning_move(game, moves)
     if possibly_winning is not None:
         # Take immediate wins.
         best_move = possibly_winning
@@ -138,7 +145,7 @@ def bot_move(game: Game) -> Move:
             after_my_move = game.clone_and_play(my_move)
             if after_my_move.result().color() == after_my_move.to_move:
                 continue  # I made a road for the opponent accidentally.
-            if winning_move(after_my_move, move_ordering(after_my_move)) is None:
+            if winning_move(after_my_move) is None:
                 best_move = my_move
                 break
 
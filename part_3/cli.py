@@ -1,37 +1,38 @@
-from takpy import Color, Game, GameResult, Move, new_game, Piece
+import sys
+from takpy import Color, Game, GameResult, Move, new_game
 from bot import bot_move
 
+# Symbols for the top piece of each stack, indexed by [int(color)][int(piece)].
+GLYPHS = [["🟧 ", "🔶 ", "🟠 "], ["🟦 ", "🔷 ", "🔵 "]]
+EMPTY = "🔳 "
+# Board labels for every supported size, so they are not rebuilt each frame.
+FILES = "   a  b  c  d  e  f  g  h"
+FILE_LABELS = {size: FILES[: 1 + size * 3] + "\n" for size in range(3, 9)}
+RANK_PREFIXES = [f"{rank} " for rank in range(1, 9)]
+
 
 def pretty_print(game: Game):
+    # Collect the whole frame and write it out at once.
+    parts: list[str] = []
     # Print the TPS.
-    print(game)
+    parts.append(f"{game}\n")
     # Print the board.
-    for rank, row in reversed(list(enumerate(game.board(), 1))):
-        print(rank, end=" ")
-        for square in row:
-            # If the square is empty, print the empty symbol.
-            if square is None:
-                print("🔳", end=" ")
-                continue
+    board = game.board()
+    for rank in range(game.size, 0, -1):
+        parts.append(RANK_PREFIXES[rank - 1])
+        for square in board[rank - 1]:
             # Print a symbol for the top piece of each stack.
-            piece, colors = square
-            match colors[-1], piece:
-                case Color.White, Piece.Flat:
-                    print("🟧", end=" ")
-                case Color.White, Piece.Wall:
-                    print("🔶", end=" ")
-                case Color.White, Piece.Cap:
-                    print("🟠", end=" ")
-                case Color.Black, Piece.Flat:
-                    print("🟦", end=" ")
-                case Color.Black, Piece.Wall:
-                    print("🔷", end=" ")
-                case Color.Black, Piece.Cap:
-                    print("🔵", end=" ")
+            if square is None:
+                parts.append(EMPTY)
+            else:
+                piece, colors = square
+                parts.append(GLYPHS[int(colors[-1])][int(piece)])
         # Print a newline after each row.
-        print()
+        parts.append("\n")
     # Print the files.
-    print("   a  b  c  d  e  f  g  h"[: 1 + game.size * 3])
+    parts.append(FILE_LABELS[game.size])
+    sys.stdout.write("".join(parts))
+    sys.stdout.flush()
 
 
 def player_move(game: Game) -> Move:
@@ -49,22 +50,32 @@ def player_move(game: Game) -> Move:
             print(f"invalid move: {error}")
 
 
-def cli():
+def cli(verbose: bool = True):
     player_color = Color.White
     game = new_game(6)
 
-    while game.result() == GameResult.Ongoing:
-        pretty_print(game)
+    # Bind names used every turn to locals once.
+    play = game.play
+    bot = bot_move
+    ongoing = GameResult.Ongoing
+    while True:
+        # Ask takpy for the result only once per turn.
+        result = game.result()
+        if result != ongoing:
+            break
+        if verbose:
+            pretty_print(game)
         if game.to_move == player_color:
             move = player_move(game)
         else:
-            move = bot_move(game)
+            move = bot(game)
             print(f"the bot played {move}")
-        game.play(move)
+        play(move)
 
     # Summary after the game.
-    pretty_print(game)
-    match game.result:
+    if verbose:
+        pretty_print(game)
+    match result:
         case GameResult.WhiteWin:
             print("🟧 wins!")
         case GameResult.BlackWin:
@@ -1,39 +1,65 @@
 import asyncio
 from websockets.asyncio.client import connect, ClientConnection
 from websockets import Subprotocol
-from takpy import Color, Move, MoveKind, Piece, Direction, new_game, GameResult
+from takpy import Color, Move, MoveKind, new_game, GameResult
 from bot import bot_move
 
+# uvloop is an optional, faster drop-in replacement for the asyncio event loop.
+try:
+    import uvloop
+except ImportError:
+    uvloop = None
+
 
 async def ping(ws: ClientConnection, stop_event: asyncio.Event):
     PERIOD_SECONDS = 30
-    while not stop_event.is_set():
-        await asyncio.sleep(PERIOD_SECONDS)
-        await ws.send("PING")
+    while True:
+        try:
+            # Wait for the stop event, but wake up to ping once the period is over.
+            await asyncio.wait_for(stop_event.wait(), timeout=PERIOD_SECONDS)
+            return
+        except TimeoutError:
+            await ws.send("PING")
+
+
+COLORS = {"white": Color.White, "black": Color.Black}
 
 
 def to_color(s: str) -> Color:
-    match s:
-        case "white":
-            return Color.White
-        case "black":
-            return Color.Black
-        case _:
-            raise ValueError("invalid color")
+    try:
+        return COLORS[s]
+    except KeyError:
+        raise ValueError("invalid color") from None
 
 
 async def wait_until_game_start(ws: ClientConnection) -> tuple[int, Color]:
     while True:
         msg = await ws.recv()
         assert isinstance(msg, bytes)  # subprotocol is "binary"
-        match msg.decode().split():
+        # Skip unrelated messages without decoding them.
+        if not msg.startswith(b"Game Start "):
+            continue
+        # Split the raw bytes and only decode the fields we need.
+        match msg.split():
             # Game Start 645331 6 Guest535 vs x57696c6c white 300 0 30 1 0 0
-            case ["Game", "Start", game_id, _, _, "vs", _, color, *_]:
-                return int(game_id), to_color(color)
+            case [b"Game", b"Start", game_id, _, _, b"vs", _, color, *_]:
+                return int(game_id), to_color(color.decode())
+
+
+# Playtak names of every square, indexed by [row][col].
+PLAYTAK_SQUARE = tuple(
+    tuple(chr(ord("A") + col) + str(row + 1) for col in range(8)) for row in range(8)
+)
 
 
 def to_playtak_square(row: int, col: int) -> str:
-    return "ABCDEFGH"[col] + str(row + 1)
+    return PLAYTAK_SQUARE[row][col]
+
+
+# Suffix for placing each piece, indexed by `int(piece)`: Flat, Wall, Cap.
+PIECE_SUFFIX = ["", " W", " C"]
+# Row and column offsets indexed by `int(direction)`: Up, Down, Left, Right.
+DIRECTION_DELTA = [(1, 0), (-1, 0), (0, -1), (0, 1)]
 
 
 def to_playtak_notation(move: Move) -> str:
@@ -41,34 +67,27 @@ def to_playtak_notation(move: Move) -> str:
     start = to_playtak_square(row, col)
     match move.kind:
         case MoveKind.Place:
-            piece = ""
-            match move.piece:
-                case Piece.Flat:
-                    pass
-                case Piece.Wall:
-                    piece = " W"
-                case Piece.Cap:
-                    piece = " C"
-            return f"P {start}{piece}"
+            return f"P {start}{PIECE_SUFFIX[int(move.piece)]}"
         case MoveKind.Spread:
             drop_counts = move.drop_counts()
             assert drop_counts is not None
-            end_row, end_col = row, col
-            match move.direction:
-                case Direction.Up:
-                    end_row += len(drop_counts)
-                case Direction.Down:
-                    end_row -= len(drop_counts)
-                case Direction.Left:
-                    end_col -= len(drop_counts)
-                case Direction.Right:
-                    end_col += len(drop_counts)
-            direction = move.direction
-            end = to_playtak_square(end_row, end_col)
-            drops = " ".join(str(x) for x in drop_counts)
+            distance = len(drop_counts)
+            dr, dc = DIRECTION_DELTA[int(move.direction)]
+            end = to_playtak_square(row + dr * distance, col + dc * distance)
+            drops = " ".join(map(str, drop_counts))
             return f"M {start} {end} {drops}"
 
 
+# Row and column of every playtak square name.
+FROM_PLAYTAK_SQUARE = {
+    name: (row, col)
+    for row, names in enumerate(PLAYTAK_SQUARE)
+    for col, name in enumerate(names)
+}
+# PTN direction symbols keyed by the sign of the (file, rank) change.
+PTN_DIRECTION = {(1, 0): ">", (-1, 0): "<", (0, 1): "+", (0, -1): "-"}
+
+
 def from_playtak_notation(s: str) -> Move:
     match s.split():
         case ["P", square, *maybe_piece]:
@@ -80,29 +99,42 @@ def from_playtak_notation(s: str) -> Move:
                     piece = "C"
             return Move(piece + square.lower())  # type: ignore
         case ["M", start, end, *drops]:
-            direction = ""
-            match ord(end[0]) - ord(start[0]), ord(end[1]) - ord(start[1]):
-                case x, y if x > 0:
-                    direction = ">"
-                case x, y if x < 0:
-                    direction = "<"
-                case x, y if y > 0:
-                    direction = "+"
-                case x, y if y < 0:
-                    direction = "-"
-            return Move(f"{sum(int(x) for x in drops)}{start.lower()}{direction}{"".join(drops)}")  # type: ignore
+            start_row, start_col = FROM_PLAYTAK_SQUARE[start]
+            end_row, end_col = FROM_PLAYTAK_SQUARE[end]
+            # The sign of the file and rank change picks the direction.
+            x = (end_col > start_col) - (end_col < start_col)
+            y = (end_row > start_row) - (end_row < start_row)
+            direction = PTN_DIRECTION[x, y]
+            # The number of picked up pieces is the sum of the drops.
+            count = 0
+            for drop in drops:
+                count += int(drop)
+            joined = "".join(drops)
+            return Move(f"{count}{start.lower()}{direction}{joined}")  # type: ignore
         case _:
             raise ValueError(f"unrecognized move: {s}")
 
 
 async def wait_until_move(ws: ClientConnection, game_id: int) -> Move:
+    prefix = f"Game#{game_id}".encode()
     while True:
         msg = await ws.recv()
         assert isinstance(msg, bytes)  # subprotocol is "binary"
-        match msg.decode().strip().split(maxsplit=1):
+        # Skip messages for other games, chat, seeks, and so on without decoding them.
+        if not msg.startswith(prefix):
+            continue
+        # Split the raw bytes and only decode the move itself.
+        match msg.strip().split(maxsplit=1):
             case [game, notation]:
-                if game == f"Game#{game_id}" and notation.startswith(("P", "M")):
-                    return from_playtak_notation(notation)
+                if game == prefix and notation.startswith((b"P", b"M")):
+                    return from_playtak_notation(notation.decode())
+
+
+async def send_all(ws: ClientConnection, outbox: list[str]):
+    """Send all queued messages together and empty the queue.
+    The sends start in order, so the server receives the messages in order."""
+    await asyncio.gather(*(ws.send(message) for message in outbox))
+    outbox.clear()
 
 
 def seek(size: int, clock_seconds: int, increment_seconds: int) -> str:
@@ -112,35 +144,54 @@ def seek(size: int, clock_seconds: int, increment_seconds: int) -> str:
 async def talk_to_playtak():
     URI = "ws://playtak.com:9999/ws"
     subprotocols = [Subprotocol("binary")]
-    async with connect(URI, subprotocols=subprotocols, ping_timeout=None) as ws:
+    # Playtak messages are short, so compressing them only costs CPU time.
+    async with connect(
+        URI, subprotocols=subprotocols, ping_timeout=None, compression=None
+    ) as ws:
         stop_event = asyncio.Event()
-        ping_task = asyncio.create_task(ping(ws, stop_event))
-
-        await ws.send("Login Guest")
-        await ws.send(seek(6, 5 * 60, 5))
-        print("Waiting for someone to join the seek...")
-
-        game_id, my_color = await wait_until_game_start(ws)
-        print(f"Game started! id: {game_id}, my_color: {my_color}")
-
-        game = new_game(6)
-        while game.result() == GameResult.Ongoing:
-            if game.to_move == my_color:
-                move = bot_move(game)
-                await ws.send(f"Game#{game_id} {to_playtak_notation(move)}")
-                print("bot played: {move}")
-            else:
-                move = await wait_until_move(ws, game_id)
-                print("opp played: {move}")
-            game.play(move)
-        print(f"result: {game.result()}")
-
-        stop_event.set()
-        print("Waiting for all background tasks to finish...")
-        await ping_task
+        # The task group waits for the ping task when the block ends,
+        # and cancels it if anything inside the block fails.
+        async with asyncio.TaskGroup() as tg:
+            tg.create_task(ping(ws, stop_event))
+
+            outbox: list[str] = []
+            outbox.append("Login Guest")
+            outbox.append(seek(6, 5 * 60, 5))
+            await send_all(ws, outbox)
+            print("Waiting for someone to join the seek...")
+
+            game_id, my_color = await wait_until_game_start(ws)
+            print(f"Game started! id: {game_id}, my_color: {my_color}")
+
+            game = new_game(6)
+            # Bind names used every turn to locals once.
+            play = game.play
+            bot = bot_move
+            ongoing = GameResult.Ongoing
+            while True:
+                # Ask takpy for the result only once per turn.
+                result = game.result()
+                if result != ongoing:
+                    break
+                if game.to_move == my_color:
+                    move = bot(game)
+                    outbox.append(f"Game#{game_id} {to_playtak_notation(move)}")
+                    await send_all(ws, outbox)
+                    print(f"bot played: {move}")
+                else:
+                    move = await wait_until_move(ws, game_id)
+                    print(f"opp played: {move}")
+                play(move)
+            print(f"result: {result}")
+
+            stop_event.set()
+            print("Waiting for all background tasks to finish...")
 
         await ws.send("quit")
 
 
 if __name__ == "__main__":
-    asyncio.run(talk_to_playtak())
+    if uvloop is not None:
+        uvloop.run(talk_to_playtak())
+    else:
+        asyncio.run(talk_to_playtak())